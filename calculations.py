@@ -1,56 +1,158 @@
+import math
+import numba
 import numpy as np
-from scipy import stats
+from functools import lru_cache
+from scipy.special import ndtri
 
-def calculate_safety_stock(demand_data, lead_time, service_level):
+# Service levels for the portfolio safety-stock sensitivity table
+SENSITIVITY_SERVICE_LEVELS = np.array([0.90, 0.95, 0.99])
+SENSITIVITY_Z_SCORES = ndtri(SENSITIVITY_SERVICE_LEVELS)
+
+
+def calculate_z_score(service_level):
+    """
+    Z-score for a service level (e.g. 0.95 -> 1.645)
+    """
+    return _zscore(round(service_level, 4))
+
+
+@lru_cache(maxsize=32)
+def _zscore(service_level):
+    """
+    Memoized ndtri, since the slider only emits a handful of distinct values
+    """
+    return float(ndtri(service_level))
+
+
+@numba.njit(cache=True, fastmath=True)
+def _mean_std(x):
+    """
+    Mean and population standard deviation in a single pass (Welford)
+    """
+    m, m2, n = 0.0, 0.0, 0
+    for v in x:
+        n += 1
+        d = v - m
+        m += d / n
+        m2 += d * (v - m)
+    return m, (m2 / n) ** 0.5
+
+
+@numba.njit(cache=True, fastmath=True)
+def _analyze_core(demand, forecast_cumsum, lead_time, z_score, current_stock, unit_cost):
+    """
+    Whole per-component chain in one compiled pass; mirrors the standalone
+    calculate_* functions below
+    """
+    mean, std = 0.0, 0.0
+    n = demand.size
+    if n > 0:
+        m2 = 0.0
+        for i in range(n):
+            d = demand[i] - mean
+            mean += d / (i + 1)
+            m2 += d * (demand[i] - mean)
+        std = (m2 / n) ** 0.5
+
+    safety_stock = max(1.0, math.ceil(z_score * std * math.sqrt(lead_time))) if n > 0 else 0.0
+
+    # Running total of the forecast makes demand during lead time O(1)
+    if forecast_cumsum.size >= lead_time:
+        demand_during_lead_time = forecast_cumsum[lead_time - 1]
+    elif forecast_cumsum.size > 0:
+        demand_during_lead_time = forecast_cumsum[-1] / forecast_cumsum.size * lead_time
+    else:
+        demand_during_lead_time = float(lead_time)
+
+    optimal_inventory = max(1.0, np.round(demand_during_lead_time + safety_stock))
+    order_quantity = max(0.0, np.round(optimal_inventory - current_stock))
+    old_method_inventory = max(1.0, np.round(mean * 60)) if n > 0 else 0.0
+
+    inventory_reduction_units = old_method_inventory - optimal_inventory
+    capital_released = inventory_reduction_units * unit_cost
+    annual_savings = capital_released * 0.15
+    return (safety_stock, optimal_inventory, order_quantity, old_method_inventory,
+            annual_savings, inventory_reduction_units, capital_released)
+
+
+def analyze_inventory(demand_data, forecast, lead_time, z_score, current_stock, unit_cost,
+                      forecast_cumsum=None):
+    """
+    Fused equivalent of calling calculate_safety_stock, calculate_optimal_inventory,
+    calculate_order_quantity, estimate_old_method_inventory and calculate_cost_savings
+    in sequence. Returns a dict of the rounded results.
+    Pass forecast_cumsum (np.cumsum of the forecast) to reuse it across lead times.
+    """
+    if forecast_cumsum is None:
+        forecast_cumsum = np.cumsum(np.asarray(forecast, dtype=np.float64).ravel())
+
+    (safety_stock, optimal_inventory, order_quantity, old_method_inventory,
+     annual_savings, reduction_units, capital_released) = _analyze_core(
+        np.asarray(demand_data, dtype=np.float64),
+        np.asarray(forecast_cumsum, dtype=np.float64),
+        int(lead_time),
+        float(z_score),
+        float(current_stock),
+        float(unit_cost)
+    )
+
+    if old_method_inventory > 0:
+        inventory_reduction = round(reduction_units / old_method_inventory * 100, 1)
+    else:
+        inventory_reduction = 0
+
+    return {
+        'safety_stock': int(safety_stock),
+        'optimal_inventory': int(optimal_inventory),
+        'order_quantity': int(order_quantity),
+        'old_method_inventory': int(old_method_inventory),
+        'annual_savings': round(annual_savings),
+        'inventory_reduction': inventory_reduction,
+        'capital_released': round(capital_released)
+    }
+
+
+def calculate_safety_stock(demand_data, lead_time, z_score):
     """
     Calculate safety stock using statistical method:
     Safety Stock = Z * σ * sqrt(lead_time)
+    z_score comes from calculate_z_score(service_level)
     Returns integer values for practical inventory management
     """
-    try:
-        if len(demand_data) == 0:
-            return 0
-            
-        # Calculate standard deviation of demand
-        std_demand = np.std(demand_data)
-        
-        # Z-score for service level
-        z_score = stats.norm.ppf(service_level)
-        
-        # Safety stock formula
-        safety_stock = z_score * std_demand * np.sqrt(lead_time)
-        
-        # Return as integer (rounded up for safety), minimum 1
-        return max(1, int(np.ceil(safety_stock)))
-    except Exception as e:
-        print(f"Error in calculate_safety_stock: {e}")
+    demand_data = np.asarray(demand_data, dtype=np.float64)
+    if demand_data.size == 0:
         return 0
 
+    # Calculate standard deviation of demand
+    _, std_demand = _mean_std(demand_data)
+
+    # Safety stock formula
+    safety_stock = z_score * std_demand * math.sqrt(lead_time)
+
+    # Return as integer (rounded up for safety), minimum 1
+    return max(1, math.ceil(safety_stock))
+
 
 def calculate_optimal_inventory(forecast, lead_time, safety_stock):
     """
     Optimal inventory = Average demand during lead time + Safety stock
     Now properly handles numpy array from get_forecast()
     """
-    try:
-        # forecast should be a numpy array from get_forecast()
-        if isinstance(forecast, np.ndarray) and len(forecast) >= lead_time:
-            # Use average of next 'lead_time' days forecast
-            demand_during_lead_time = np.mean(forecast[:lead_time]) * lead_time
+    # forecast should be a numpy array from get_forecast()
+    if isinstance(forecast, np.ndarray) and len(forecast) >= lead_time:
+        # Sum of next 'lead_time' days forecast
+        demand_during_lead_time = np.sum(forecast[:lead_time])
+    else:
+        # Fallback: if forecast is not as expected, use simple calculation
+        if hasattr(forecast, "__len__") and len(forecast) > 0:
+            avg_demand = np.mean(forecast)
         else:
-            # Fallback: if forecast is not as expected, use simple calculation
-            if hasattr(forecast, "__len__") and len(forecast) > 0:
-                avg_demand = np.mean(forecast)
-            else:
-                avg_demand = forecast if isinstance(forecast, (int, float)) else 1
-            demand_during_lead_time = avg_demand * lead_time
-
-        # Return as integer
-        optimal_inv = demand_during_lead_time + safety_stock
-        return max(1, int(np.round(optimal_inv)))
-    except Exception as e:
-        print(f"Error in calculate_optimal_inventory: {e}")
-        return 0
+            avg_demand = forecast if isinstance(forecast, (int, float)) else 1
+        demand_during_lead_time = avg_demand * lead_time
+
+    # Return as integer
+    optimal_inv = demand_during_lead_time + safety_stock
+    return max(1, round(optimal_inv))
 
 
 def calculate_order_quantity(optimal_inventory, current_stock):
@@ -58,47 +160,166 @@ def calculate_order_quantity(optimal_inventory, current_stock):
     Order quantity = Optimal inventory - Current stock
     Returns integer values, minimum 0
     """
-    try:
-        order_qty = optimal_inventory - current_stock
-        return max(0, int(np.round(order_qty)))
-    except Exception as e:
-        print(f"Error in calculate_order_quantity: {e}")
-        return 0
+    order_qty = optimal_inventory - current_stock
+    return max(0, round(order_qty))
 
 
 def estimate_old_method_inventory(demand_data):
     """
     Old method = average demand × 60 days (2 months buffer)
     """
-    try:
-        if len(demand_data) == 0:
-            return 0
-        old_inventory = np.mean(demand_data) * 60
-        return max(1, int(np.round(old_inventory)))
-    except Exception as e:
-        print(f"Error in estimate_old_method_inventory: {e}")
+    demand_data = np.asarray(demand_data, dtype=np.float64)
+    if demand_data.size == 0:
         return 0
+    mean_demand, _ = _mean_std(demand_data)
+    old_inventory = mean_demand * 60
+    return max(1, round(old_inventory))
 
 
 def calculate_cost_savings(optimal_inventory, old_method_inventory, unit_cost):
     """
     Cost savings calculations with practical rounding
     """
-    try:
-        inventory_reduction_units = old_method_inventory - optimal_inventory
-        capital_released = inventory_reduction_units * unit_cost
-        annual_savings = capital_released * 0.15
-        
-        if old_method_inventory > 0:
-            inventory_reduction_percentage = (inventory_reduction_units / old_method_inventory) * 100
+    inventory_reduction_units = old_method_inventory - optimal_inventory
+    capital_released = inventory_reduction_units * unit_cost
+    annual_savings = capital_released * 0.15
+
+    if old_method_inventory > 0:
+        inventory_reduction_percentage = (inventory_reduction_units / old_method_inventory) * 100
+    else:
+        inventory_reduction_percentage = 0
+
+    return (
+        round(annual_savings),  # Whole dollars
+        round(inventory_reduction_percentage, 1),  # 1 decimal for percentage
+        round(capital_released)  # Whole dollars
+    )
+
+
+def calculate_portfolio_inventory(mean_demand, std_demand, lead_time, z_score,
+                                  current_stock, unit_cost):
+    """
+    Vectorized version of the per-component chain across all components at once.
+    Uses average daily demand in place of a forecast for demand during lead time.
+    Returns a dict of numpy arrays keyed like the single-component results.
+    """
+    mean_demand = np.asarray(mean_demand, dtype=np.float64)
+    std_demand = np.asarray(std_demand, dtype=np.float64)
+    current_stock = np.asarray(current_stock, dtype=np.float64)
+    unit_cost = np.asarray(unit_cost, dtype=np.float64)
+
+    safety_stock = np.maximum(1, np.ceil(z_score * std_demand * np.sqrt(lead_time)))
+    optimal_inventory = np.maximum(1, np.round(mean_demand * lead_time + safety_stock))
+    order_quantity = np.maximum(0, np.round(optimal_inventory - current_stock))
+    old_method_inventory = np.maximum(1, np.round(mean_demand * 60))
+
+    inventory_reduction_units = old_method_inventory - optimal_inventory
+    capital_released = inventory_reduction_units * unit_cost
+    annual_savings = capital_released * 0.15
+    inventory_reduction = inventory_reduction_units / old_method_inventory * 100
+
+    return {
+        'safety_stock': safety_stock.astype(int),
+        'optimal_inventory': optimal_inventory.astype(int),
+        'order_quantity': order_quantity.astype(int),
+        'old_method_inventory': old_method_inventory.astype(int),
+        'annual_savings': np.round(annual_savings).astype(int),
+        'inventory_reduction': np.round(inventory_reduction, 1),
+        'capital_released': np.round(capital_released).astype(int)
+    }
+
+
+def calculate_safety_stock_sensitivity(std_demand, lead_time):
+    """
+    Safety stock for every component at each of SENSITIVITY_SERVICE_LEVELS.
+    Returns an integer matrix of shape (components, service levels)
+    """
+    std_demand = np.asarray(std_demand, dtype=np.float64)
+    safety_stock = SENSITIVITY_Z_SCORES[None, :] * std_demand[:, None] * np.sqrt(lead_time)
+    return np.maximum(1, np.ceil(safety_stock)).astype(int)
+
+
+@numba.njit(cache=True)
+def _alerts_core(mean_demand, std_demand, current_stock):
+    """
+    Alert safety stock and urgency for every component in one compiled loop
+    """
+    n = current_stock.size
+    safety_stock = np.empty(n)
+    urgency = np.zeros(n, dtype=np.int8)
+    for i in range(n):
+        ss = mean_demand[i] * 1.5
+        # Single-observation components have no std; fall back to 1.5x mean
+        buffered = mean_demand[i] + 2.0 * std_demand[i]
+        if buffered > ss:
+            ss = buffered
+        safety_stock[i] = ss
+        if current_stock[i] < ss * 0.5:
+            urgency[i] = 2
+        elif current_stock[i] < ss:
+            urgency[i] = 1
+    return safety_stock, urgency
+
+
+def compute_alerts(mean_demand, std_demand, current_stock):
+    """
+    Stock alert check across all components:
+    Safety Stock = max(1.5 × mean, mean + 2σ)
+    Returns (safety_stock, urgency) arrays, urgency 2 = critical (below half
+    the safety stock), 1 = high (below safety stock), 0 = no alert
+    """
+    return _alerts_core(
+        np.ascontiguousarray(mean_demand, dtype=np.float64),
+        np.ascontiguousarray(std_demand, dtype=np.float64),
+        np.ascontiguousarray(current_stock, dtype=np.float64)
+    )
+
+
+@numba.njit(cache=True)
+def _report_core(current_stock, mean_demand, std_demand, lead_time, z_score):
+    """
+    Report safety stock, optimal level, order quantity and status code per
+    component in one compiled loop
+    """
+    n = current_stock.size
+    safety_stock = np.empty(n)
+    optimal_inventory = np.empty(n)
+    order_quantity = np.empty(n)
+    status = np.empty(n, dtype=np.int8)
+    z_sqrt_lead_time = z_score * math.sqrt(lead_time)
+    for i in range(n):
+        # Single-observation components have no std; fall back to 1.5x mean
+        if np.isnan(std_demand[i]):
+            ss = mean_demand[i] * 1.5
+        else:
+            ss = z_sqrt_lead_time * std_demand[i]
+        opt = max(ss * 2, mean_demand[i] * 45)
+        safety_stock[i] = ss
+        optimal_inventory[i] = opt
+        order_quantity[i] = max(0.0, opt - current_stock[i])
+        if current_stock[i] < ss * 0.5:
+            status[i] = 0
+        elif current_stock[i] < ss:
+            status[i] = 1
+        elif current_stock[i] < opt:
+            status[i] = 2
         else:
-            inventory_reduction_percentage = 0
-
-        return (
-            int(np.round(annual_savings)),  # Whole dollars
-            round(inventory_reduction_percentage, 1),  # 1 decimal for percentage
-            int(np.round(capital_released))  # Whole dollars
-        )
-    except Exception as e:
-        print(f"Error in calculate_cost_savings: {e}")
-        return 0, 0, 0
+            status[i] = 3
+    return safety_stock, optimal_inventory, order_quantity, status
+
+
+def score_report_components(current_stock, mean_demand, std_demand, lead_time=30, z_score=1.65):
+    """
+    Report-page inventory levels for every component:
+    Safety Stock = Z × σ × sqrt(lead_time) (1.5 × mean without a σ)
+    Optimal = max(2 × safety stock, 45 days of mean demand)
+    Returns (safety_stock, optimal_inventory, order_quantity, status) arrays,
+    status 0 = critical, 1 = low, 2 = adequate, 3 = excess
+    """
+    return _report_core(
+        np.ascontiguousarray(current_stock, dtype=np.float64),
+        np.ascontiguousarray(mean_demand, dtype=np.float64),
+        np.ascontiguousarray(std_demand, dtype=np.float64),
+        int(lead_time),
+        float(z_score)
+    )
@@ -1,12 +1,117 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
 from prophet import Prophet
+from prophet.serialize import model_from_json
 import pandas as pd
 import numpy as np
 
-def get_forecast(component_data, periods=90):
+# Histories shorter than this use the seasonal-naive forecaster instead of Prophet
+PROPHET_MIN_HISTORY = 500
+TREND_WINDOW_DAYS = 90
+# Written by scripts/prefit_prophet.py
+PREFIT_MODELS_PATH = 'data/prophet_models.json'
+
+
+def build_prophet():
+    """
+    Unfitted Prophet model with the settings used for every component
+    """
+    # Only yhat is used downstream, so skip the uncertainty sampling
+    # that predict() would otherwise run for yhat_lower/yhat_upper
+    return Prophet(
+        yearly_seasonality='auto',
+        weekly_seasonality=True,
+        daily_seasonality=False,
+        seasonality_mode='additive',
+        uncertainty_samples=0
+    )
+
+
+def history_fingerprint(prophet_df):
+    """
+    SHA-256 of a Prophet history's dates and values, stored with each prefit
+    model so a corrected Units_Used over the same dates invalidates the fit
+    """
+    digest = hashlib.sha256()
+    digest.update(prophet_df['ds'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+    digest.update(prophet_df['y'].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def load_prefit_models():
+    """
+    Prefit entries ({'model', 'fingerprint'}) keyed by Component_ID, empty if
+    none have been prefit
+    """
+    if not os.path.exists(PREFIT_MODELS_PATH):
+        return {}
+    with open(PREFIT_MODELS_PATH) as f:
+        return json.load(f)
+
+
+def get_prefit_model(component_id, prophet_df):
+    """
+    Prefit model for a component, or None when missing or fit on other history
+    """
+    entry = load_prefit_models().get(str(component_id))
+    # Files from before fingerprints were stored hold bare model strings
+    if not isinstance(entry, dict) or entry.get('fingerprint') != history_fingerprint(prophet_df):
+        return None
+    return model_from_json(entry['model'])
+
+
+def seasonal_naive_forecast(component_data, periods=90):
+    """
+    Lightweight forecast: weekly seasonal index (mean demand per weekday
+    relative to overall mean) scaled by a linear trend fitted on the last
+    90 days. Returns forecast values as numpy array, like get_forecast().
+    """
+    history = component_data[['Date', 'Units_Used']].dropna()
+    if len(history) < 2:
+        avg_demand = component_data['Units_Used'].mean()
+        return np.array([avg_demand] * periods)
+
+    dates = pd.to_datetime(history['Date'])
+    units = history['Units_Used'].to_numpy(dtype=float)
+
+    # Weekly seasonal index, 1.0 for weekdays never observed
+    overall_mean = units.mean()
+    weekday_mean = history['Units_Used'].groupby(dates.dt.dayofweek.values).mean()
+    seasonal_index = np.ones(7)
+    if overall_mean > 0:
+        seasonal_index[weekday_mean.index] = weekday_mean.to_numpy() / overall_mean
+
+    # Linear trend over the most recent window
+    days = (dates - dates.min()).dt.days.to_numpy(dtype=float)
+    recent = days >= days.max() - TREND_WINDOW_DAYS
+    if recent.sum() >= 2 and np.ptp(days[recent]) > 0:
+        slope, intercept = np.polyfit(days[recent], units[recent], 1)
+    else:
+        slope, intercept = 0.0, units[recent].mean()
+
+    future_days = days.max() + np.arange(1, periods + 1)
+    future_weekdays = (dates.max().dayofweek + np.arange(1, periods + 1)) % 7
+    forecast = (intercept + slope * future_days) * seasonal_index[future_weekdays]
+
+    return np.maximum(forecast, 0)
+
+
+def get_forecast(component_data, periods=90, use_prophet=None):
     """
     Generates a forecast using Facebook Prophet for the given component data.
     Returns forecast VALUES (yhat) as numpy array for calculations.
+    use_prophet=None picks Prophet only for long histories, unless the
+    INVENTORY_FAST_FORECAST environment variable is set.
     """
+    if use_prophet is None:
+        use_prophet = (len(component_data) >= PROPHET_MIN_HISTORY
+                       and not os.environ.get('INVENTORY_FAST_FORECAST'))
+    if not use_prophet:
+        return seasonal_naive_forecast(component_data, periods)
+
     try:
         # Prepare data for Prophet
         prophet_df = component_data[['Date', 'Units_Used']].copy()
@@ -20,16 +125,13 @@ def get_forecast(component_data, periods=90):
             avg_demand = component_data['Units_Used'].mean()
             return np.array([avg_demand] * periods)
         
-        # Initialize and fit the model
-        model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            interval_width=0.95,
-            seasonality_mode='multiplicative'
-        )
-        
-        model.fit(prophet_df)
+        # Reuse a prefit model when it matches this history, otherwise fit one
+        model = None
+        if 'Component_ID' in component_data:
+            model = get_prefit_model(component_data['Component_ID'].iloc[0], prophet_df)
+        if model is None:
+            model = build_prophet()
+            model.fit(prophet_df)
         
         # Create future dataframe
         future = model.make_future_dataframe(periods=periods, freq='D')
@@ -38,10 +140,10 @@ def get_forecast(component_data, periods=90):
         forecast_df = model.predict(future)
         
         # Return only the future forecast values (yhat) as numpy array
-        future_forecast = forecast_df.tail(periods)['yhat'].values
+        future_forecast = forecast_df['yhat'].values[-periods:].copy()
         
         # Ensure no negative forecasts (inventory can't be negative)
-        future_forecast = np.maximum(future_forecast, 0)
+        np.clip(future_forecast, 0, None, out=future_forecast)
         
         return future_forecast
         
@@ -1,64 +1,80 @@
-import sys
-import os
 import numpy as np
-from scipy import stats
-
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) 
-
-# Try importing calculations
-try:
-    from calculations import (
-        calculate_safety_stock,
-        calculate_optimal_inventory,
-        calculate_order_quantity,
-        estimate_old_method_inventory,
-        calculate_cost_savings
-    )
-    print("✅ Successfully imported from calculations")
-except ImportError as e:
-    print(f"❌ Error importing from calculations: {e}")
-    print(f"❌ Current working directory: {os.getcwd()}")
-    print(f"❌ Files in parent directory: {os.listdir('..')}")
-
-from model import get_forecast
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-
-# Define the function at the TOP LEVEL (outside any other blocks)
-def calculate_safety_stock(demand_data, lead_time, service_level):
-    # Calculate standard deviation of demand
-    demand_std = np.std(demand_data)
-    
-    # Z-score based on service level (example: 95% -> 1.65)
-    z_score = stats.norm.ppf(service_level)
-    
-    # Safety stock formula
-    safety_stock = z_score * demand_std * np.sqrt(lead_time)
-    
-    return safety_stock
+import plotly.graph_objects as go
+
+# Streamlit puts the main script's directory (the repo root) on sys.path
+from calculations import (
+    analyze_inventory,
+    calculate_z_score,
+    calculate_portfolio_inventory,
+    calculate_safety_stock_sensitivity,
+    SENSITIVITY_SERVICE_LEVELS
+)
+from model import get_forecast
+from utils import component_histories, compute_component_stats, load_data, lttb_downsample
 
 # Streamlit App
 st.title("📈 Demand Analysis")
 
-@st.cache_data
-def load_data():
-    historical = pd.read_csv('data/historical_data.csv')
-    current = pd.read_csv('data/current_stocks.csv')
-    historical['Date'] = pd.to_datetime(historical['Date'])
-    return historical, current
+# Longest lead time the slider allows; forecasts cover it plus the 60-day buffer
+MAX_LEAD_TIME = 90
+FORECAST_HORIZON = MAX_LEAD_TIME + 60
+# Line and area traces are downsampled (LTTB) to at most this many points
+CHART_MAX_POINTS = 500
+
+# A resource rather than cached data: reruns get the same frames back instead
+# of a fresh copy of the whole history, so nothing below may modify them
+@st.cache_resource(show_spinner=False)
+def load_demand_data():
+    _, current = load_data()
+    stock_lookup = current.set_index('Component_ID')[
+        ['Current_Stock', 'Unit_Cost', 'Category']].to_dict('index')
+    # The categories are shared with the current stock frame, so list only
+    # components that actually have history
+    components = sorted(component_histories())
+    return current, stock_lookup, components
+
+@st.cache_data(show_spinner=False)
+def cached_forecast(component, comp_data):
+    # Prophet fitting dominates the analysis, so forecast the longest horizon
+    # once per component; any lead time is then an index into the running total
+    forecast = get_forecast(comp_data, periods=FORECAST_HORIZON)
+    return forecast, np.cumsum(forecast)
+
+@st.cache_data(show_spinner=False)
+def build_demand_chart(component, time_frame, chart_type, chart_data):
+    # Switching back to a chart already drawn reuses the cached figure
+    dates = chart_data['Date'].values
+    units = chart_data['Units_Used'].values
+    if chart_type == "Bar":
+        # One bar per day, so every point is kept
+        trace = go.Bar(x=dates, y=units)
+    else:
+        # Longer ranges ("All Time") keep the line's shape with far fewer points
+        dates, units = lttb_downsample(dates, units, CHART_MAX_POINTS)
+        if chart_type == "Line":
+            trace = go.Scatter(x=dates, y=units, mode='lines')
+        else:
+            trace = go.Scatter(x=dates, y=units, mode='lines', fill='tozeroy')
+    
+    fig = go.Figure(trace)
+    fig.update_layout(title=f"Demand Forecast for {component} - {time_frame}",
+                      template="plotly_white",
+                      xaxis_title="Date", yaxis_title="Units Used")
+    return fig
 
-historical_df, current_df = load_data()
+current_df, stock_lookup, components = load_demand_data()
+comp_groups = component_histories()
 
 # Sidebar - Component Selection and Details
 st.sidebar.header("🔧 Component Selection")
-component = st.sidebar.selectbox("Select Component", sorted(historical_df['Component_ID'].unique()))
+component = st.sidebar.selectbox("Select Component", components)
 
 # Get component data
-comp_data = historical_df[historical_df['Component_ID'] == component]
-current_stock = current_df[current_df['Component_ID'] == component]['Current_Stock'].values[0]
-unit_cost = current_df[current_df['Component_ID'] == component]['Unit_Cost'].values[0]
-category = current_df[current_df['Component_ID'] == component]['Category'].values[0]
+comp_data = comp_groups[component]
+stock_row = stock_lookup[component]
+current_stock, unit_cost, category = stock_row['Current_Stock'], stock_row['Unit_Cost'], stock_row['Category']
 avg_daily_demand = comp_data['Units_Used'].mean()
 
 # Display Component Details in Sidebar
@@ -70,8 +86,9 @@ st.sidebar.metric("Category", category)
 
 # Configuration Parameters
 st.sidebar.header("⚙️ Configuration")
-lead_time = st.sidebar.slider("Lead Time (days)", 7, 90, 30)
+lead_time = st.sidebar.slider("Lead Time (days)", 7, MAX_LEAD_TIME, 30)
 service_level = st.sidebar.slider("Service Level", 0.85, 0.99, 0.95)
+z_score = calculate_z_score(service_level)
 
 # Main Content Area
 col1, col2 = st.columns([3, 2])
@@ -101,20 +118,7 @@ with col1:
     # Chart Type Selection
     chart_type = st.radio("Chart Type", ["Line", "Area", "Bar"], horizontal=True)
     
-    if chart_type == "Line":
-        fig = px.line(chart_data, x='Date', y='Units_Used', 
-                     title=f"Demand Forecast for {component} - {time_frame}",
-                     template="plotly_white")
-    elif chart_type == "Area":
-        fig = px.area(chart_data, x='Date', y='Units_Used',
-                     title=f"Demand Forecast for {component} - {time_frame}",
-                     template="plotly_white")
-    else:
-        fig = px.bar(chart_data, x='Date', y='Units_Used',
-                    title=f"Demand Forecast for {component} - {time_frame}",
-                    template="plotly_white")
-    
-    fig.update_layout(xaxis_title="Date", yaxis_title="Units Used")
+    fig = build_demand_chart(component, time_frame, chart_type, chart_data)
     st.plotly_chart(fig, use_container_width=True)
 
 with col2:
@@ -124,26 +128,18 @@ with col2:
         with st.spinner("Analyzing demand patterns and calculating optimal inventory..."):
             try:
                 # Generate forecast
-                forecast = get_forecast(comp_data, periods=lead_time + 60)
+                forecast, forecast_cumsum = cached_forecast(component, comp_data)
                 
-                # Calculate metrics
-                safety_stock = calculate_safety_stock(comp_data['Units_Used'].values, lead_time, service_level)
-                optimal_inventory = calculate_optimal_inventory(forecast, lead_time, safety_stock)
-                order_quantity = calculate_order_quantity(optimal_inventory, current_stock)
-                old_method_inventory = estimate_old_method_inventory(comp_data['Units_Used'].values)
-                annual_savings, inventory_reduction, capital_released = calculate_cost_savings(
-                    optimal_inventory, old_method_inventory, unit_cost
+                # Calculate metrics in a single fused pass
+                results = analyze_inventory(
+                    comp_data['Units_Used'].values, forecast, lead_time,
+                    z_score, current_stock, unit_cost,
+                    forecast_cumsum=forecast_cumsum
                 )
 
                 # Store results in session state
                 st.session_state.results = {
-                    'optimal_inventory': optimal_inventory,
-                    'safety_stock': safety_stock,
-                    'order_quantity': order_quantity,
-                    'old_method_inventory': old_method_inventory,
-                    'annual_savings': annual_savings,
-                    'inventory_reduction': inventory_reduction,
-                    'capital_released': capital_released,
+                    **results,
                     'component': component,
                     'unit_cost': unit_cost
                 }
@@ -197,3 +193,32 @@ with stat_col3:
     st.metric("Demand Variability", f"{comp_data['Units_Used'].std():.2f}")
 with stat_col4:
     st.metric("Service Level Target", f"{service_level*100:.0f}%")
+
+# Whole-portfolio view: the same calculations vectorized across every component
+if st.checkbox("Show portfolio-wide optimization"):
+    # Population std, matching the per-component analysis
+    component_stats = compute_component_stats(ddof=0)
+    portfolio = current_df.join(component_stats, on='Component_ID', how='inner')
+    portfolio_results = calculate_portfolio_inventory(
+        portfolio['mean'], portfolio['std'], lead_time, z_score,
+        portfolio['Current_Stock'], portfolio['Unit_Cost']
+    )
+    portfolio_df = pd.DataFrame({
+        'Component_ID': portfolio['Component_ID'].values,
+        'Current_Stock': portfolio['Current_Stock'].values,
+        'Safety_Stock': portfolio_results['safety_stock'],
+        'Optimal_Inventory': portfolio_results['optimal_inventory'],
+        'Order_Quantity': portfolio_results['order_quantity'],
+        'Annual_Savings': portfolio_results['annual_savings'],
+        'Inventory_Reduction_%': portfolio_results['inventory_reduction']
+    })
+    st.dataframe(portfolio_df, use_container_width=True)
+
+    st.markdown("**Safety Stock Sensitivity by Service Level**")
+    sensitivity = calculate_safety_stock_sensitivity(portfolio['std'], lead_time)
+    sensitivity_df = pd.DataFrame(
+        sensitivity,
+        columns=[f"{level:.0%} Service" for level in SENSITIVITY_SERVICE_LEVELS]
+    )
+    sensitivity_df.insert(0, 'Component_ID', portfolio['Component_ID'].values)
+    st.dataframe(sensitivity_df, use_container_width=True)
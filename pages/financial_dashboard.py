@@ -1,20 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
+from calculations import compute_alerts
+from utils import compute_component_stats, load_data
 
 st.title("💰 Financial Dashboard")
 
-@st.cache_data
-def load_data():
-    historical = pd.read_csv('data/historical_data.csv')
-    current = pd.read_csv('data/current_stocks.csv')
-    historical['Date'] = pd.to_datetime(historical['Date'])
-    return historical, current
-
-historical_df, current_df = load_data()
+_, current_df = load_data()
 
 # Calculate ROI function
 def calculate_roi(annual_savings, capital_invested):
@@ -23,42 +17,85 @@ def calculate_roi(annual_savings, capital_invested):
     return 0
 
 # Stock alert function
-def check_stock_alerts(current_df, historical_df):
-    alerts = []
-    for _, row in current_df.iterrows():
-        component = row['Component_ID']
-        current_stock = row['Current_Stock']
-        unit_cost = row['Unit_Cost']
-        
-        # Get demand data for this component
-        comp_data = historical_df[historical_df['Component_ID'] == component]
-        if len(comp_data) > 0:
-            avg_demand = comp_data['Units_Used'].mean()
-            std_demand = comp_data['Units_Used'].std()
-            
-            # Simple safety stock calculation (1.5x avg demand + buffer)
-            safety_stock = max(avg_demand * 1.5, avg_demand + 2 * std_demand)
-            
-            if current_stock < safety_stock * 0.5:
-                urgency = "CRITICAL"
-                alert_type = "error"
-            elif current_stock < safety_stock:
-                urgency = "HIGH"
-                alert_type = "warning"
-            else:
-                continue
-                
-            alerts.append({
-                'component': component,
-                'current_stock': current_stock,
-                'safety_stock': round(safety_stock),
-                'unit_cost': unit_cost,
-                'urgency': urgency,
-                'alert_type': alert_type,
-                'needed_quantity': max(0, round(safety_stock - current_stock))
-            })
-    
-    return alerts
+URGENCY_LABELS = np.array(["", "HIGH", "CRITICAL"])
+
+@st.cache_data
+def check_stock_alerts(current_df):
+    # Shared per-component demand stats, joined onto current stock
+    demand_stats = compute_component_stats()
+    merged = current_df.join(demand_stats, on='Component_ID', how='inner')
+
+    current_stock = merged['Current_Stock'].to_numpy()
+
+    # Simple safety stock calculation (1.5x avg demand + buffer)
+    safety_stock, urgency_level = compute_alerts(merged['mean'], merged['std'], current_stock)
+
+    urgency = URGENCY_LABELS[urgency_level]
+    alert_mask = urgency_level > 0
+
+    alerts_df = pd.DataFrame({
+        'component': merged['Component_ID'].to_numpy()[alert_mask],
+        'current_stock': current_stock[alert_mask],
+        'safety_stock': np.round(safety_stock[alert_mask]).astype(int),
+        'unit_cost': merged['Unit_Cost'].to_numpy()[alert_mask],
+        'urgency': urgency[alert_mask],
+        'alert_type': np.where(urgency[alert_mask] == "CRITICAL", "error", "warning"),
+        'needed_quantity': np.maximum(0, np.round(safety_stock[alert_mask] - current_stock[alert_mask])).astype(int)
+    })
+    return alerts_df.to_dict('records')
+
+# Chart builders, cached on the scalar results so reruns reuse the figures
+@st.cache_data
+def make_savings_fig(annual_savings, capital_released):
+    fig = go.Figure([
+        go.Bar(x=['Annual Savings'], y=[annual_savings], name='Recurring', marker_color='#00CC96'),
+        go.Bar(x=['Capital Released'], y=[capital_released], name='One-time', marker_color='#636EFA')
+    ])
+    fig.update_layout(title="Financial Benefits Breakdown", template="plotly_white",
+                      legend_title_text='Type', xaxis_title="", yaxis_title="Amount ($)")
+    return fig
+
+@st.cache_data
+def make_inventory_fig(old_method_inventory, optimal_inventory):
+    fig = go.Figure([
+        go.Bar(x=['Current System'], y=[old_method_inventory], name='Traditional', marker_color='#EF553B'),
+        go.Bar(x=['AI Optimized'], y=[optimal_inventory], name='AI-Driven', marker_color='#00CC96')
+    ])
+    fig.update_layout(title="Inventory Level Comparison", template="plotly_white",
+                      legend_title_text='Type', xaxis_title="", yaxis_title="Inventory Level (Units)")
+    return fig
+
+@st.cache_data
+def make_reduction_fig(inventory_reduction, units_reduced):
+    fig = go.Figure(go.Bar(x=['Reduction Percentage', 'Units Reduced'],
+                           y=[inventory_reduction, units_reduced]))
+    fig.update_layout(title="Inventory Reduction Impact", template="plotly_white",
+                      xaxis_title="", yaxis_title="Value")
+    return fig
+
+@st.cache_data
+def make_projection_fig(annual_savings, start_date, months=12):
+    monthly_savings = annual_savings / 12
+    timeline = pd.date_range(start_date, periods=months+1, freq='30D')
+    cumulative_savings = monthly_savings * np.arange(months+1)
+    
+    fig = go.Figure(go.Scatter(x=[f"Month {i}" for i in range(months+1)], y=cumulative_savings,
+                               customdata=timeline, mode='lines', fill='tozeroy',
+                               hovertemplate="%{x} (%{customdata|%Y-%m-%d})<br>%{y:,.2f}<extra></extra>"))
+    fig.update_layout(title="Projected Cumulative Savings (12 Months)", template="plotly_white",
+                      xaxis_title="Timeline", yaxis_title="Cumulative Savings ($)")
+    return fig
+
+@st.cache_data
+def make_component_fig(component_df):
+    fig = go.Figure([
+        go.Bar(x=component_df['Component'].to_numpy(), y=component_df[column].to_numpy(), name=column)
+        for column in ['Current Value', 'Potential Savings']
+    ])
+    fig.update_layout(title="Inventory Value vs Potential Savings by Component",
+                      template="plotly_white", barmode='group',
+                      xaxis_title="Component", yaxis_title="Amount (₹)")
+    return fig
 
 # Main Dashboard Content
 if 'results' in st.session_state:
@@ -66,21 +103,22 @@ if 'results' in st.session_state:
     
     # Stock Alerts Section
     st.header("🚨 Stock Alerts & Warnings")
-    alerts = check_stock_alerts(current_df, historical_df)
+    alerts = check_stock_alerts(current_df)
     
     if alerts:
         critical_alerts = [a for a in alerts if a['urgency'] == "CRITICAL"]
         high_alerts = [a for a in alerts if a['urgency'] == "HIGH"]
         
+        # One element per severity rather than one per alert
         if critical_alerts:
-            st.error("### 🔴 Critical Stock Shortages")
-            for alert in critical_alerts:
-                st.error(f"**{alert['component']}**: Only {alert['current_stock']} units left (Safety: {alert['safety_stock']} units). Need to order {alert['needed_quantity']} units immediately!")
+            st.error("### 🔴 Critical Stock Shortages\n\n" + "\n".join(
+                f"- **{alert['component']}**: Only {alert['current_stock']} units left (Safety: {alert['safety_stock']} units). Need to order {alert['needed_quantity']} units immediately!"
+                for alert in critical_alerts))
         
         if high_alerts:
-            st.warning("### 🟡 High Priority Alerts")
-            for alert in high_alerts:
-                st.warning(f"**{alert['component']}**: {alert['current_stock']} units (Safety: {alert['safety_stock']} units). Consider ordering {alert['needed_quantity']} units.")
+            st.warning("### 🟡 High Priority Alerts\n\n" + "\n".join(
+                f"- **{alert['component']}**: {alert['current_stock']} units (Safety: {alert['safety_stock']} units). Consider ordering {alert['needed_quantity']} units."
+                for alert in high_alerts))
     else:
         st.success("### ✅ All stock levels are adequate")
     
@@ -111,32 +149,12 @@ if 'results' in st.session_state:
     
     with col1:
         # Savings Comparison Chart
-        savings_data = pd.DataFrame({
-            'Category': ['Annual Savings', 'Capital Released'],
-            'Amount': [results['annual_savings'], results['capital_released']],
-            'Type': ['Recurring', 'One-time']
-        })
-        
-        fig1 = px.bar(savings_data, x='Category', y='Amount', color='Type',
-                     title="Financial Benefits Breakdown",
-                     template="plotly_white",
-                     color_discrete_map={'Recurring': '#00CC96', 'One-time': '#636EFA'})
-        fig1.update_layout(xaxis_title="", yaxis_title="Amount ($)")
+        fig1 = make_savings_fig(results['annual_savings'], results['capital_released'])
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Inventory Level Comparison
-        inventory_data = pd.DataFrame({
-            'Method': ['Current System', 'AI Optimized'],
-            'Inventory Level': [results['old_method_inventory'], results['optimal_inventory']],
-            'Type': ['Traditional', 'AI-Driven']
-        })
-        
-        fig2 = px.bar(inventory_data, x='Method', y='Inventory Level', color='Type',
-                     title="Inventory Level Comparison",
-                     template="plotly_white",
-                     color_discrete_map={'Traditional': '#EF553B', 'AI-Driven': '#00CC96'})
-        fig2.update_layout(xaxis_title="", yaxis_title="Inventory Level (Units)")
+        fig2 = make_inventory_fig(results['old_method_inventory'], results['optimal_inventory'])
         st.plotly_chart(fig2, use_container_width=True)
     
     # Detailed Inventory Analysis
@@ -146,68 +164,31 @@ if 'results' in st.session_state:
     
     with col1:
         # Inventory Reduction Impact
-        reduction_data = pd.DataFrame({
-            'Metric': ['Reduction Percentage', 'Units Reduced'],
-            'Value': [results['inventory_reduction'], 
-                     results['old_method_inventory'] - results['optimal_inventory']],
-            'Unit': ['%', 'units']
-        })
-        
-        fig3 = px.bar(reduction_data, x='Metric', y='Value', 
-                     title="Inventory Reduction Impact",
-                     template="plotly_white")
-        fig3.update_layout(xaxis_title="", yaxis_title="Value")
+        fig3 = make_reduction_fig(results['inventory_reduction'],
+                                  results['old_method_inventory'] - results['optimal_inventory'])
         st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Cost Savings Over Time (Projection)
-        months = 12
-        monthly_savings = results['annual_savings'] / 12
-        timeline = [datetime.now() + timedelta(days=30*i) for i in range(months+1)]
-        cumulative_savings = [monthly_savings * i for i in range(months+1)]
-        
-        savings_timeline = pd.DataFrame({
-            'Month': [f"Month {i}" for i in range(months+1)],
-            'Cumulative Savings': cumulative_savings,
-            'Date': timeline
-        })
-        
-        fig4 = px.area(savings_timeline, x='Month', y='Cumulative Savings',
-                      title="Projected Cumulative Savings (12 Months)",
-                      template="plotly_white")
-        fig4.update_layout(xaxis_title="Timeline", yaxis_title="Cumulative Savings ($)")
+        fig4 = make_projection_fig(results['annual_savings'], datetime.now().date())
         st.plotly_chart(fig4, use_container_width=True)
     
     # Component-wise Analysis
     st.header("📋 Component-wise Financial Impact")
     
     # Create sample data for multiple components (in real app, this would come from your data)
-    components = current_df['Component_ID'].unique()[:5]  # Top 5 components
-    component_data = []
-    
-    for component in components:
-        comp_current = current_df[current_df['Component_ID'] == component]
-        if len(comp_current) > 0:
-            unit_cost = comp_current['Unit_Cost'].values[0]
-            current_stock = comp_current['Current_Stock'].values[0]
-            # Simplified calculation for demonstration
-            potential_savings = current_stock * unit_cost * 0.15  # 15% savings estimate
-            
-            component_data.append({
-                'Component': component,
-                'Current Value': current_stock * unit_cost,
-                'Potential Savings': potential_savings,
-                'Unit Cost': unit_cost
-            })
-    
-    if component_data:
-        component_df = pd.DataFrame(component_data)
-        
-        fig5 = px.bar(component_df, x='Component', y=['Current Value', 'Potential Savings'],
-                     title="Inventory Value vs Potential Savings by Component",
-                     template="plotly_white",
-                     barmode='group')
-        fig5.update_layout(xaxis_title="Component", yaxis_title="Amount (₹)")
+    top_components = current_df.drop_duplicates('Component_ID').head(5)  # Top 5 components
+    current_value = top_components['Current_Stock'] * top_components['Unit_Cost']
+    component_df = pd.DataFrame({
+        'Component': top_components['Component_ID'].astype(str).to_numpy(),
+        'Current Value': current_value.to_numpy(),
+        # Simplified calculation for demonstration: 15% savings estimate
+        'Potential Savings': (current_value * 0.15).to_numpy(),
+        'Unit Cost': top_components['Unit_Cost'].to_numpy()
+    })
+    
+    if not component_df.empty:
+        fig5 = make_component_fig(component_df)
         st.plotly_chart(fig5, use_container_width=True)
     
     # Recommendations Section
@@ -238,11 +219,12 @@ else:
     
     # Show general stock alerts even without AI analysis
     st.header("🚨 Current Stock Status")
-    alerts = check_stock_alerts(current_df, historical_df)
+    alerts = check_stock_alerts(current_df)
     
     if alerts:
         st.warning("**Stock alerts detected based on current inventory levels:**")
-        for alert in alerts[:3]:  # Show top 3 alerts
-            st.write(f"- {alert['component']}: {alert['current_stock']} units (Safety: {alert['safety_stock']} units)")
+        st.markdown("\n".join(  # Show top 3 alerts
+            f"- {alert['component']}: {alert['current_stock']} units (Safety: {alert['safety_stock']} units)"
+            for alert in alerts[:3]))
     else:
         st.success("No critical stock alerts detected.")
@@ -4,20 +4,46 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
+from utils import compute_component_stats, component_histories, load_data, top_k_positions
 
 st.title("📊 Portfolio Overview")
 
+# Stock turnover ratios, cached across reruns with the same filters
 @st.cache_data
-def load_data():
-    historical = pd.read_csv('data/historical_data.csv')
-    current = pd.read_csv('data/current_stocks.csv')
-    historical['Date'] = pd.to_datetime(historical['Date'])
-    return historical, current
+def compute_turnover(filtered_df):
+    avg_demand = compute_component_stats()['mean'].rename('avg_demand')
+    t = filtered_df.join(avg_demand, on='Component_ID', how='inner')
+    stock = t['Current_Stock'].to_numpy()
+    turnover_ratio = np.divide(t['avg_demand'].to_numpy(), stock,
+                               out=np.zeros(len(t)), where=stock > 0)
+    return pd.DataFrame({
+        'Component': t['Component_ID'].to_numpy(),
+        'Turnover_Ratio': turnover_ratio,
+        'Category': t['Category'].to_numpy()
+    })
 
-historical_df, current_df = load_data()
+# Sidebar choices and slider bounds, so reruns skip the column scans
+@st.cache_data
+def filter_options(current_df):
+    components = tuple(sorted(current_df['Component_ID'].unique()))
+    categories = tuple(sorted(current_df['Category'].unique()))
+    cost_bounds = (float(current_df['Unit_Cost'].min()), float(current_df['Unit_Cost'].max()))
+    return components, categories, cost_bounds
+
+# Row position per component plus the stock and cost columns as arrays,
+# so the detail panel reads two scalars instead of filtering the frame
+@st.cache_data
+def component_arrays(current_df):
+    component_index = {cid: i for i, cid in enumerate(current_df['Component_ID'].to_numpy())}
+    return component_index, current_df['Current_Stock'].to_numpy(), current_df['Unit_Cost'].to_numpy()
+
+_, current_df = load_data()
+components, categories, (cost_lo, cost_hi) = filter_options(current_df)
+component_index, stock_arr, cost_arr = component_arrays(current_df)
 
 # Calculate additional metrics
-total_inventory_value = (current_df['Current_Stock'] * current_df['Unit_Cost']).sum()
+total_inventory_value = np.dot(current_df['Current_Stock'].to_numpy(dtype=np.float64),
+                               current_df['Unit_Cost'].to_numpy(dtype=np.float64))
 avg_unit_cost = current_df['Unit_Cost'].mean()
 total_current_stock = current_df['Current_Stock'].sum()
 
@@ -25,31 +51,41 @@ total_current_stock = current_df['Current_Stock'].sum()
 st.sidebar.header("🔍 Filter Options")
 
 # Component selector
-all_components = ["All Components"] + sorted(current_df['Component_ID'].unique())
+all_components = ["All Components", *components]
 selected_component = st.sidebar.selectbox("Select Component", all_components)
 
 # Category filter
-all_categories = ["All Categories"] + sorted(current_df['Category'].unique())
+all_categories = ["All Categories", *categories]
 selected_category = st.sidebar.selectbox("Filter by Category", all_categories)
 
 # Cost range filter
 min_cost, max_cost = st.sidebar.slider(
     "Filter by Unit Cost Range",
-    min_value=float(current_df['Unit_Cost'].min()),
-    max_value=float(current_df['Unit_Cost'].max()),
-    value=(float(current_df['Unit_Cost'].min()), float(current_df['Unit_Cost'].max()))
+    min_value=cost_lo,
+    max_value=cost_hi,
+    value=(cost_lo, cost_hi)
 )
 
-# Apply filters
-filtered_df = current_df.copy()
+# Apply filters as one boolean mask, indexing current_df a single time
+unit_cost = current_df['Unit_Cost'].to_numpy()
+mask = (unit_cost >= min_cost) & (unit_cost <= max_cost)
 if selected_component != "All Components":
-    filtered_df = filtered_df[filtered_df['Component_ID'] == selected_component]
+    mask &= (current_df['Component_ID'] == selected_component).to_numpy()
 if selected_category != "All Categories":
-    filtered_df = filtered_df[filtered_df['Category'] == selected_category]
-filtered_df = filtered_df[
-    (filtered_df['Unit_Cost'] >= min_cost) & 
-    (filtered_df['Unit_Cost'] <= max_cost)
-]
+    mask &= (current_df['Category'] == selected_category).to_numpy()
+filtered_df = current_df.loc[mask]
+
+# Derived value columns, added once and shared by every tab below
+filtered_df = filtered_df.assign(
+    Inventory_Value=filtered_df['Current_Stock'] * filtered_df['Unit_Cost'],
+    Value_Contribution=lambda d: d['Inventory_Value'] / d['Inventory_Value'].sum() * 100
+)
+
+# Rank once: one stock ordering serves the top-15 chart and the low-stock list,
+# and since value contribution ranks like value, the top 20 by value backs the
+# value chart, the ABC chart and the high-value list
+stock_order = np.argsort(filtered_df['Current_Stock'].to_numpy(), kind='stable')
+value_order = top_k_positions(filtered_df['Inventory_Value'], 20)
 
 # Main Dashboard - Key Metrics
 st.header("📈 Portfolio Summary")
@@ -73,24 +109,25 @@ with col4:
 if selected_component != "All Components":
     st.header(f"🔧 {selected_component} - Detailed Analysis")
     
-    component_data = current_df[current_df['Component_ID'] == selected_component].iloc[0]
-    historical_data = historical_df[historical_df['Component_ID'] == selected_component]
+    row = component_index[selected_component]
+    component_stock, component_cost = stock_arr[row].item(), cost_arr[row].item()
+    historical_data = component_histories().get(selected_component)
     
-    if not historical_data.empty:
+    if historical_data is not None:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Current Stock", f"{component_data['Current_Stock']} units")
+            st.metric("Current Stock", f"{component_stock} units")
         
         with col2:
-            avg_demand = historical_data['Units_Used'].mean()
+            avg_demand = compute_component_stats().loc[selected_component, 'mean']
             st.metric("Avg Daily Demand", f"{avg_demand:.1f} units")
         
         with col3:
-            st.metric("Unit Cost", f"₹{component_data['Unit_Cost']:.2f}")
+            st.metric("Unit Cost", f"₹{component_cost:.2f}")
         
         with col4:
-            inventory_value = component_data['Current_Stock'] * component_data['Unit_Cost']
+            inventory_value = component_stock * component_cost
             st.metric("Inventory Value", f"₹{inventory_value:,.2f}")
         
         # Component-specific charts
@@ -98,16 +135,19 @@ if selected_component != "All Components":
         
         with col_chart1:
             # Demand trend for selected component
-            fig_trend = px.line(historical_data.tail(90), x='Date', y='Units_Used',
-                               title=f"Demand Trend - {selected_component} (Last 90 Days)",
-                               template="plotly_white")
+            trend_data = historical_data.tail(90)
+            fig_trend = go.Figure(go.Scattergl(x=trend_data['Date'].to_numpy(),
+                                               y=trend_data['Units_Used'].to_numpy(), mode='lines'))
+            fig_trend.update_layout(title=f"Demand Trend - {selected_component} (Last 90 Days)",
+                                    template="plotly_white",
+                                    xaxis_title="Date", yaxis_title="Units_Used")
             st.plotly_chart(fig_trend, use_container_width=True)
         
         with col_chart2:
             # Stock level analysis
             stock_data = pd.DataFrame({
                 'Metric': ['Current Stock', 'Avg Monthly Demand'],
-                'Value': [component_data['Current_Stock'], avg_demand * 30]
+                'Value': [component_stock, avg_demand * 30]
             })
             fig_stock = px.bar(stock_data, x='Metric', y='Value',
                               title=f"Stock vs Demand - {selected_component}",
@@ -117,14 +157,16 @@ if selected_component != "All Components":
 # Interactive Charts Section
 st.header("📊 Interactive Portfolio Analysis")
 
-tab1, tab2, tab3, tab4 = st.tabs(["Category Distribution", "Cost Analysis", "Stock Levels", "Performance Metrics"])
+# A radio instead of st.tabs, so only the selected view's charts are computed
+view = st.radio("Select View", ["Category Distribution", "Cost Analysis", "Stock Levels", "Performance Metrics"],
+                horizontal=True, key='portfolio_view')
 
-with tab1:
+if view == "Category Distribution":
     # Category Distribution Pie Chart
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        category_stock = filtered_df.groupby('Category')['Current_Stock'].sum().reset_index()
+        category_stock = filtered_df.groupby('Category', observed=True)['Current_Stock'].sum().reset_index()
         fig_pie = px.pie(category_stock, values='Current_Stock', names='Category',
                         title="Inventory Distribution by Category",
                         template="plotly_white")
@@ -132,39 +174,39 @@ with tab1:
     
     with col2:
         st.subheader("Category Summary")
-        for category in category_stock.nlargest(5, 'Current_Stock')['Category']:
-            stock = category_stock[category_stock['Category'] == category]['Current_Stock'].values[0]
+        top_categories = category_stock.iloc[top_k_positions(category_stock['Current_Stock'], 5)]
+        for category, stock in zip(top_categories['Category'], top_categories['Current_Stock']):
             st.write(f"**{category}**: {stock:,} units")
 
-with tab2:
+elif view == "Cost Analysis":
     # Unit Cost Analysis
     col1, col2 = st.columns(2)
     
     with col1:
-        # Cost distribution histogram
-        fig_cost_hist = px.histogram(filtered_df, x='Unit_Cost', 
-                                    title="Unit Cost Distribution",
-                                    template="plotly_white",
-                                    nbins=20)
-        fig_cost_hist.update_layout(xaxis_title="Unit Cost (₹)", yaxis_title="Number of Components")
+        # Cost distribution histogram, binned here so only 20 bars are sent
+        counts, edges = np.histogram(filtered_df['Unit_Cost'].to_numpy(), bins=20)
+        fig_cost_hist = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts,
+                                         width=np.diff(edges)))
+        fig_cost_hist.update_layout(title="Unit Cost Distribution", template="plotly_white",
+                                    bargap=0, xaxis_title="Unit Cost (₹)", yaxis_title="Number of Components")
         st.plotly_chart(fig_cost_hist, use_container_width=True)
     
     with col2:
         # Top 10 most expensive components
-        top_expensive = filtered_df.nlargest(10, 'Unit_Cost')
+        top_expensive = filtered_df.iloc[top_k_positions(filtered_df['Unit_Cost'], 10)]
         fig_expensive = px.bar(top_expensive, x='Component_ID', y='Unit_Cost',
                               title="Top 10 Most Expensive Components",
                               template="plotly_white")
         fig_expensive.update_layout(xaxis_title="Component", yaxis_title="Unit Cost (₹)")
         st.plotly_chart(fig_expensive, use_container_width=True)
 
-with tab3:
+elif view == "Stock Levels":
     # Stock Level Analysis
     col1, col2 = st.columns(2)
     
     with col1:
         # Current stock levels by component
-        top_stock = filtered_df.nlargest(15, 'Current_Stock')
+        top_stock = filtered_df.iloc[top_k_positions(filtered_df['Current_Stock'], 15)]
         fig_stock_levels = px.bar(top_stock, x='Component_ID', y='Current_Stock',
                                  color='Category',
                                  title="Top 15 Components by Stock Level",
@@ -174,8 +216,7 @@ with tab3:
     
     with col2:
         # Stock value analysis
-        filtered_df['Inventory_Value'] = filtered_df['Current_Stock'] * filtered_df['Unit_Cost']
-        top_value = filtered_df.nlargest(10, 'Inventory_Value')
+        top_value = filtered_df.iloc[value_order[:10]]
         fig_value = px.bar(top_value, x='Component_ID', y='Inventory_Value',
                           color='Category',
                           title="Top 10 Components by Inventory Value",
@@ -183,14 +224,13 @@ with tab3:
         fig_value.update_layout(xaxis_title="Component", yaxis_title="Inventory Value (₹)")
         st.plotly_chart(fig_value, use_container_width=True)
 
-with tab4:
+elif view == "Performance Metrics":
     # Performance Metrics
     col1, col2 = st.columns(2)
     
     with col1:
         # ABC Analysis (simplified)
-        filtered_df['Value_Contribution'] = filtered_df['Inventory_Value'] / filtered_df['Inventory_Value'].sum() * 100
-        abc_analysis = filtered_df.nlargest(20, 'Value_Contribution')
+        abc_analysis = filtered_df.iloc[value_order]
         
         fig_abc = px.bar(abc_analysis, x='Component_ID', y='Value_Contribution',
                         color='Category',
@@ -201,22 +241,10 @@ with tab4:
     
     with col2:
         # Stock turnover potential (simplified)
-        turnover_data = []
-        for _, row in filtered_df.iterrows():
-            component = row['Component_ID']
-            comp_historical = historical_df[historical_df['Component_ID'] == component]
-            if not comp_historical.empty:
-                avg_demand = comp_historical['Units_Used'].mean()
-                turnover_ratio = avg_demand / row['Current_Stock'] if row['Current_Stock'] > 0 else 0
-                turnover_data.append({
-                    'Component': component,
-                    'Turnover_Ratio': turnover_ratio,
-                    'Category': row['Category']
-                })
+        turnover_df = compute_turnover(filtered_df)
         
-        if turnover_data:
-            turnover_df = pd.DataFrame(turnover_data)
-            top_turnover = turnover_df.nlargest(10, 'Turnover_Ratio')
+        if not turnover_df.empty:
+            top_turnover = turnover_df.iloc[top_k_positions(turnover_df['Turnover_Ratio'], 10)]
             fig_turnover = px.bar(top_turnover, x='Component', y='Turnover_Ratio',
                                  color='Category',
                                  title="Top 10 Components by Turnover Potential",
@@ -233,8 +261,8 @@ with col1:
     st.subheader("📋 Top Recommendations")
     
     # Identify components needing attention
-    low_stock_components = filtered_df.nsmallest(3, 'Current_Stock')
-    high_value_components = filtered_df.nlargest(3, 'Inventory_Value')
+    low_stock_components = filtered_df.iloc[stock_order[:3]]
+    high_value_components = filtered_df.iloc[value_order[:3]]
     
     st.info("**Low Stock Alert:**")
     for _, comp in low_stock_components.iterrows():
@@ -1,109 +1,106 @@
 import streamlit as st
 import pandas as pd
+import plotly.express as px
 from datetime import datetime
-import base64
 import numpy as np
 from io import BytesIO
+from calculations import score_report_components
+from utils import compute_component_stats, load_data, top_k_positions
 
 st.title("📋 Inventory Optimization Reports")
 
+_, current_df = load_data()
+
+# Report parameters: default lead time and the z-score for a 95% service level
+REPORT_LEAD_TIME = 30
+REPORT_Z_SCORE = 1.65
+
+# Labels for score_report_components status codes (critical, low, adequate, excess)
+STOCK_STATUS = np.array(["CRITICAL", "LOW", "ADEQUATE", "EXCESS"])
+PRIORITY_LEVEL = np.array(["HIGH", "MEDIUM", "LOW", "LOW"])
+RECOMMENDED_ACTION = np.array(["IMMEDIATE ORDER REQUIRED", "PLAN ORDER", "MONITOR", "REDUCE STOCK"])
+
+EXPORT_MIME = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
 @st.cache_data
-def load_data():
-    historical = pd.read_csv('data/historical_data.csv')
-    current = pd.read_csv('data/current_stocks.csv')
-    historical['Date'] = pd.to_datetime(historical['Date'])
-    return historical, current
+def export_bytes(df, file_format):
+    # Serialized once per report rather than on every rerun
+    if file_format == 'parquet':
+        return df.to_parquet(index=False)
+    # pandas writes the CSV bytes straight into the buffer Streamlit serves
+    buffer = BytesIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
 
-historical_df, current_df = load_data()
+def download_button(df, filename):
+    file_format = filename.rsplit('.', 1)[-1]
+    st.download_button(f"📥 Download {filename}", data=export_bytes(df, file_format),
+                       file_name=filename, mime=EXPORT_MIME[file_format])
 
-def create_download_link(df, filename):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    return f'<a href="data:file/csv;base64,{b64}" download="{filename}">📥 Download {filename}</a>'
+@st.cache_data
+def precompute_stats(current_df):
+    # Current stock joined with demand stats, one row per Component_ID, so
+    # regenerating the report (for any component) reuses the aggregate
+    return (current_df.drop_duplicates('Component_ID').set_index('Component_ID')
+            .join(compute_component_stats(), how='inner'))
 
-def generate_comprehensive_report(current_df, historical_df, specific_component=None):
-    report_data = []
-    analysis_date = datetime.now().strftime('%Y-%m-%d')
-    
-    components_to_analyze = current_df['Component_ID'].unique()
+@st.cache_data
+def make_comparison_fig(current_total, optimal_total):
+    # Keyed on the two totals, so tab re-renders reuse the figure
+    comparison_data = pd.DataFrame({
+        'Type': ['Current Inventory', 'Optimal Inventory'],
+        'Value': [current_total, optimal_total]
+    })
+    return px.bar(comparison_data, x='Type', y='Value',
+                  title="Current vs Optimal Inventory Value",
+                  template="plotly_white")
+
+def generate_comprehensive_report(current_df, specific_component=None, generated_at=None):
+    analysis_date = (generated_at or datetime.now()).strftime('%Y-%m-%d')
+    merged = precompute_stats(current_df)
     if specific_component:
-        components_to_analyze = [specific_component]
+        # Hash lookup on the Component_ID index; no history means an empty report
+        merged = merged.loc[[specific_component]] if specific_component in merged.index else merged.iloc[:0]
     
-    for component in components_to_analyze:
-        comp_data = current_df[current_df['Component_ID'] == component]
-        if len(comp_data) == 0:
-            continue
-            
-        comp_row = comp_data.iloc[0]
-        current_stock = comp_row['Current_Stock']
-        unit_cost = comp_row['Unit_Cost']
-        category = comp_row['Category']
-        
-        # Get historical data for calculations
-        hist_data = historical_df[historical_df['Component_ID'] == component]
-        if len(hist_data) == 0:
-            continue
-            
-        # Calculate basic metrics
-        avg_daily_demand = hist_data['Units_Used'].mean()
-        demand_std = hist_data['Units_Used'].std()
-        lead_time = 30  # Default lead time
-        
-        # Safety stock calculation (simplified)
-        z_score = 1.65  # 95% service level
-        safety_stock = z_score * demand_std * np.sqrt(lead_time) if not np.isnan(demand_std) else avg_daily_demand * 1.5
-        
-        # Optimal inventory calculation
-        optimal_inventory = max(safety_stock * 2, avg_daily_demand * 45)  # 45 days coverage
-        
-        # Order quantity calculation
-        order_quantity = max(0, optimal_inventory - current_stock)
-        
-        # Stock status
-        if current_stock < safety_stock * 0.5:
-            status = "CRITICAL"
-            priority = "HIGH"
-            action = "IMMEDIATE ORDER REQUIRED"
-        elif current_stock < safety_stock:
-            status = "LOW"
-            priority = "MEDIUM"
-            action = "PLAN ORDER"
-        elif current_stock < optimal_inventory:
-            status = "ADEQUATE"
-            priority = "LOW"
-            action = "MONITOR"
-        else:
-            status = "EXCESS"
-            priority = "LOW"
-            action = "REDUCE STOCK"
-        
-        # Cost calculations
-        current_inventory_value = current_stock * unit_cost
-        optimal_inventory_value = optimal_inventory * unit_cost
-        potential_savings = current_inventory_value - optimal_inventory_value
-        
-        report_data.append({
-            'Component_ID': component,
-            'Category': category,
-            'Analysis_Date': analysis_date,
-            'Current_Stock': current_stock,
-            'Unit_Cost': unit_cost,
-            'Current_Inventory_Value': current_inventory_value,
-            'Avg_Daily_Demand': round(avg_daily_demand, 2),
-            'Demand_Std_Dev': round(demand_std, 2) if not np.isnan(demand_std) else 0,
-            'Safety_Stock': round(safety_stock),
-            'Optimal_Inventory_Level': round(optimal_inventory),
-            'Recommended_Order_Quantity': round(order_quantity),
-            'Lead_Time_Days': lead_time,
-            'Stock_Status': status,
-            'Priority_Level': priority,
-            'Recommended_Action': action,
-            'Optimal_Inventory_Value': round(optimal_inventory_value, 2),
-            'Potential_Cost_Savings': round(max(0, potential_savings), 2),
-            'Service_Level_Target': '95%'
-        })
+    current_stock = merged['Current_Stock'].to_numpy()
+    unit_cost = merged['Unit_Cost'].to_numpy()
+    avg_daily_demand = merged['mean'].to_numpy()
+    demand_std = merged['std'].to_numpy()
+    has_std = ~np.isnan(demand_std)
+    
+    # Safety stock, optimal level, order quantity and stock status
+    safety_stock, optimal_inventory, order_quantity, status_code = score_report_components(
+        current_stock, avg_daily_demand, demand_std, REPORT_LEAD_TIME, REPORT_Z_SCORE)
+    status = STOCK_STATUS[status_code]
+    priority = PRIORITY_LEVEL[status_code]
+    action = RECOMMENDED_ACTION[status_code]
+    
+    # Cost calculations
+    current_inventory_value = current_stock * unit_cost
+    optimal_inventory_value = optimal_inventory * unit_cost
+    potential_savings = current_inventory_value - optimal_inventory_value
     
-    return pd.DataFrame(report_data)
+    return pd.DataFrame({
+        'Component_ID': merged.index.astype(str).to_numpy(),
+        # Low-cardinality labels as categoricals holding only the observed values
+        'Category': pd.Categorical(merged['Category'].astype(str).to_numpy()),
+        'Analysis_Date': analysis_date,
+        'Current_Stock': current_stock,
+        'Unit_Cost': unit_cost,
+        'Current_Inventory_Value': current_inventory_value,
+        'Avg_Daily_Demand': np.round(avg_daily_demand, 2),
+        'Demand_Std_Dev': np.where(has_std, np.round(demand_std, 2), 0),
+        'Safety_Stock': np.round(safety_stock).astype(int),
+        'Optimal_Inventory_Level': np.round(optimal_inventory).astype(int),
+        'Recommended_Order_Quantity': np.round(order_quantity).astype(int),
+        'Lead_Time_Days': REPORT_LEAD_TIME,
+        'Stock_Status': pd.Categorical(status),
+        'Priority_Level': pd.Categorical(priority),
+        'Recommended_Action': action,
+        'Optimal_Inventory_Value': np.round(optimal_inventory_value, 2),
+        'Potential_Cost_Savings': np.round(np.maximum(0, potential_savings), 2),
+        'Service_Level_Target': '95%'
+    })
 
 # Main Report Interface
 st.header("📊 Generate Comprehensive Reports")
@@ -125,16 +122,27 @@ else:
 
 if st.button("🚀 Generate Report", type="primary"):
     with st.spinner("Generating comprehensive inventory analysis report..."):
-        report_df = generate_comprehensive_report(current_df, historical_df, specific_component)
+        # One timestamp for the report's Analysis_Date and its footer
+        generated_at = datetime.now()
+        report_df = generate_comprehensive_report(current_df, specific_component, generated_at)
         
         if not report_df.empty:
             st.session_state.current_report = report_df
+            st.session_state.report_generated_at = generated_at
+            # Ranked once per report; the cost tab reads this slice on reruns
+            st.session_state.current_report_top_savings = report_df.iloc[
+                top_k_positions(report_df['Potential_Cost_Savings'], 10)]
             st.success(f"✅ Report generated successfully! Analyzed {len(report_df)} components.")
 
 # Display Report if Available
 if 'current_report' in st.session_state:
     report_df = st.session_state.current_report
     
+    # Split by priority once; the summary, action and export sections share these
+    priority_level = report_df['Priority_Level']
+    critical_df = report_df[priority_level == 'HIGH']
+    medium_df = report_df[priority_level == 'MEDIUM']
+    
     # Summary Metrics
     st.header("📈 Report Summary")
     
@@ -145,8 +153,7 @@ if 'current_report' in st.session_state:
         st.metric("Components Analyzed", total_components)
     
     with col2:
-        critical_items = len(report_df[report_df['Priority_Level'] == 'HIGH'])
-        st.metric("Critical Items", critical_items)
+        st.metric("Critical Items", len(critical_df))
     
     with col3:
         total_savings = report_df['Potential_Cost_Savings'].sum()
@@ -206,7 +213,7 @@ if 'current_report' in st.session_state:
         
         with stat_col2:
             st.write("**Category-wise Analysis:**")
-            category_summary = report_df.groupby('Category').agg({
+            category_summary = report_df.groupby('Category', observed=True).agg({
                 'Current_Stock': 'sum',
                 'Potential_Cost_Savings': 'sum',
                 'Component_ID': 'count'
@@ -217,26 +224,23 @@ if 'current_report' in st.session_state:
         st.subheader("🚨 Priority Action Items")
         
         # Critical items
-        critical_items = report_df[report_df['Priority_Level'] == 'HIGH']
-        if not critical_items.empty:
+        if not critical_df.empty:
             st.error("**🔴 CRITICAL ITEMS - IMMEDIATE ACTION REQUIRED**")
-            for _, item in critical_items.iterrows():
-                st.error(f"""
-                **{item['Component_ID']}** ({item['Category']})
-                - Current Stock: {item['Current_Stock']} units
-                - Safety Stock: {item['Safety_Stock']} units
-                - Order Required: {item['Recommended_Order_Quantity']} units
-                - Action: {item['Recommended_Action']}
-                """)
+            # One element for every critical item
+            st.error("\n\n".join(
+                f"**{item['Component_ID']}** ({item['Category']})\n"
+                f"- Current Stock: {item['Current_Stock']} units\n"
+                f"- Safety Stock: {item['Safety_Stock']} units\n"
+                f"- Order Required: {item['Recommended_Order_Quantity']} units\n"
+                f"- Action: {item['Recommended_Action']}"
+                for item in critical_df.to_dict('records')))
         
         # Medium priority items
-        medium_items = report_df[report_df['Priority_Level'] == 'MEDIUM']
-        if not medium_items.empty:
+        if not medium_df.empty:
             st.warning("**🟡 MEDIUM PRIORITY ITEMS - PLAN ACTION**")
-            for _, item in medium_items.head(3).iterrows():  # Show top 3
-                st.warning(f"""
-                **{item['Component_ID']}** - Order {item['Recommended_Order_Quantity']} units
-                """)
+            st.warning("\n\n".join(  # Show top 3
+                f"**{item['Component_ID']}** - Order {item['Recommended_Order_Quantity']} units"
+                for item in medium_df.head(3).to_dict('records')))
     
     with tab4:
         st.subheader("💰 Cost Optimization Analysis")
@@ -245,7 +249,7 @@ if 'current_report' in st.session_state:
         
         with col1:
             # Cost savings potential
-            savings_data = report_df.nlargest(10, 'Potential_Cost_Savings')
+            savings_data = st.session_state.current_report_top_savings
             if not savings_data.empty:
                 fig_savings = px.bar(savings_data, x='Component_ID', y='Potential_Cost_Savings',
                                     title="Top 10 Cost Savings Opportunities",
@@ -257,14 +261,7 @@ if 'current_report' in st.session_state:
             current_total = report_df['Current_Inventory_Value'].sum()
             optimal_total = report_df['Optimal_Inventory_Value'].sum()
             
-            comparison_data = pd.DataFrame({
-                'Type': ['Current Inventory', 'Optimal Inventory'],
-                'Value': [current_total, optimal_total]
-            })
-            
-            fig_comparison = px.bar(comparison_data, x='Type', y='Value',
-                                  title="Current vs Optimal Inventory Value",
-                                  template="plotly_white")
+            fig_comparison = make_comparison_fig(float(current_total), float(optimal_total))
             st.plotly_chart(fig_comparison, use_container_width=True)
     
     # Download Section
@@ -274,26 +271,24 @@ if 'current_report' in st.session_state:
     
     with col1:
         # Full report download
-        st.markdown(create_download_link(report_df, "comprehensive_inventory_report.csv"), 
-                   unsafe_allow_html=True)
+        download_button(report_df, "comprehensive_inventory_report.csv")
+        # Parquet keeps the column types and is several times smaller
+        download_button(report_df, "comprehensive_inventory_report.parquet")
     
     with col2:
         # Purchase recommendations only
         if 'purchase_df' in locals():
-            st.markdown(create_download_link(purchase_df, "purchase_recommendations.csv"), 
-                       unsafe_allow_html=True)
+            download_button(purchase_df, "purchase_recommendations.csv")
         else:
             st.info("No purchase recommendations")
     
     with col3:
         # Critical items report
-        critical_report = report_df[report_df['Priority_Level'] == 'HIGH']
-        if not critical_report.empty:
-            st.markdown(create_download_link(critical_report, "critical_items_report.csv"), 
-                       unsafe_allow_html=True)
+        if not critical_df.empty:
+            download_button(critical_df, "critical_items_report.csv")
     
     # Report Generation Date
-    st.write(f"*Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+    st.write(f"*Report generated on: {st.session_state.report_generated_at.strftime('%Y-%m-%d %H:%M:%S')}*")
 
 else:
     st.info("👆 Click 'Generate Report' to create comprehensive inventory analysis reports")
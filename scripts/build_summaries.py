@@ -0,0 +1,21 @@
+"""
+Pre-aggregate the usage history into data/demand_summary.parquet (mean
+Units_Used per component), so the landing page reads a one-row-per-component
+table instead of the whole history. Without a summary at least as new as the
+history, the app streams the means of just the components it charts. Run from the repository root:
+python -m scripts.build_summaries
+"""
+import pandas as pd
+from utils import HISTORICAL_DTYPES, write_data_file
+
+
+def main():
+    historical = pd.read_csv('data/historical_data.csv', usecols=['Component_ID', 'Units_Used'],
+                             dtype=HISTORICAL_DTYPES)
+    summary = historical.groupby('Component_ID', observed=True)['Units_Used'].mean()
+    write_data_file(summary.reset_index(), 'demand_summary')
+    print("Wrote data/demand_summary.parquet")
+
+
+if __name__ == '__main__':
+    main()
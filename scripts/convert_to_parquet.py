@@ -0,0 +1,28 @@
+"""
+Convert the CSV data files to Parquet so the app loads typed columns without
+re-parsing text. The loaders prefer a Parquet file when it is at least as new
+as its CSV, and write one themselves after a CSV parse; this script refreshes
+both up front. Run from the repository root: python -m scripts.convert_to_parquet
+"""
+import pandas as pd
+from utils import (
+    CURRENT_COLUMNS,
+    CURRENT_DTYPES,
+    HISTORICAL_COLUMNS,
+    HISTORICAL_DTYPES,
+    write_data_file
+)
+
+
+def main():
+    historical = pd.read_csv('data/historical_data.csv', usecols=HISTORICAL_COLUMNS,
+                             parse_dates=['Date'], dtype=HISTORICAL_DTYPES)
+    write_data_file(historical, 'historical_data')
+
+    current = pd.read_csv('data/current_stocks.csv', usecols=CURRENT_COLUMNS, dtype=CURRENT_DTYPES)
+    write_data_file(current, 'current_stocks')
+    print("Wrote data/historical_data.parquet and data/current_stocks.parquet")
+
+
+if __name__ == '__main__':
+    main()
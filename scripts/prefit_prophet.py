@@ -0,0 +1,32 @@
+"""
+Fit a Prophet model per component and save them to data/prophet_models.json,
+so get_forecast can skip fitting at click time.
+Run from the repository root: python -m scripts.prefit_prophet
+"""
+import json
+import pandas as pd
+from prophet.serialize import model_to_json
+from model import build_prophet, history_fingerprint, PREFIT_MODELS_PATH
+
+
+def main():
+    historical = pd.read_csv('data/historical_data.csv', parse_dates=['Date'])
+    models = {}
+    for component, comp_data in historical.groupby('Component_ID', sort=False):
+        prophet_df = comp_data[['Date', 'Units_Used']].rename(
+            columns={'Date': 'ds', 'Units_Used': 'y'}).dropna()
+        if len(prophet_df) < 2:
+            continue
+        model = build_prophet()
+        model.fit(prophet_df)
+        models[component] = {'model': model_to_json(model),
+                             'fingerprint': history_fingerprint(prophet_df)}
+        print(f"Fitted {component}")
+
+    with open(PREFIT_MODELS_PATH, 'w') as f:
+        json.dump(models, f)
+    print(f"Saved {len(models)} models to {PREFIT_MODELS_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,7 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-from calculations import *
-from model import get_forecast
+from utils import load_current_data, load_demand_summary, mean_usage
 
 st.set_page_config(
     page_title="AI Inventory Command Center",
@@ -12,7 +11,7 @@ st.set_page_config(
 )
 
 # Simple CSS for blue buttons only
-st.markdown("""
+_CSS = """
 <style>
     /* Simple blue buttons */
     .stButton > button {
@@ -32,23 +31,74 @@ st.markdown("""
         color: white;
     }
 </style>
-""", unsafe_allow_html=True)
-
-@st.cache_data
-def load_data():
-    try:
-        historical = pd.read_csv('data/historical_data.csv')
-        current = pd.read_csv('data/current_stocks.csv')
-        historical['Date'] = pd.to_datetime(historical['Date'])
-        return historical, current
-    except:
-        return None, None
+"""
+# Re-emitted on every run: Streamlit removes elements a rerun does not send again
+st.markdown(_CSS, unsafe_allow_html=True)
+
+# Components shown in the recent demand chart (the first rows of current stock)
+RECENT_COMPONENT_COUNT = 5
+
+# Every dashboard figure derived from the loaded data, in one cached pass
+# so a rerun with unchanged data is a single lookup
+@st.cache_data(show_spinner=False)
+def compute_dashboard(current_df, demand_means):
+    stock = current_df['Current_Stock'].to_numpy(dtype=np.float64)
+    cost = current_df['Unit_Cost'].to_numpy(dtype=np.float64)
+    values = stock * cost
+
+    # Two-column frame from the raw arrays, so the grouped sum carries nothing else
+    category_value = (pd.DataFrame({'Category': current_df['Category'].values, 'Total_Value': values})
+                      .groupby('Category', sort=False, observed=True)['Total_Value'].sum().reset_index())
+
+    # Looked up in the per-component means
+    recent_components = current_df['Component_ID'].head(RECENT_COMPONENT_COUNT).astype(str)
+    recent_means = demand_means[demand_means.index.isin(recent_components)].sort_index()
+
+    return {
+        'total_components': len(current_df),
+        'total_categories': current_df['Category'].nunique(),
+        # Fused multiply-and-sum, no intermediate array
+        'total_inventory_value': float(np.dot(stock, cost)),
+        'avg_unit_cost': float(cost.mean()),
+        'category_value': category_value,
+        'recent_summary': recent_means.reset_index()
+    }
+
+# Chart builders, cached on the small reduced frames so reruns reuse the figures.
+# The traces are built straight from the grouped arrays with graph_objects,
+# imported here rather than at module top since only these charts need it
+@st.cache_data(show_spinner=False)
+def category_value_fig(category_value):
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Pie(labels=category_value['Category'].to_numpy(),
+                           values=category_value['Total_Value'].to_numpy(),
+                           textposition='inside', textinfo='percent+label'))
+    fig.update_layout(title="Inventory Distribution by Category", template="plotly_white")
+    return fig
+
+@st.cache_data(show_spinner=False)
+def recent_demand_fig(recent_summary):
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Bar(x=recent_summary['Component_ID'].astype(str).to_numpy(),
+                           y=recent_summary['Units_Used'].to_numpy()))
+    fig.update_layout(title="Average Demand - Top 5 Components", template="plotly_white",
+                      xaxis_title="Component_ID", yaxis_title="Units_Used")
+    return fig
 
 # Main Title
 st.title("🏭 AI Inventory Command Center")
 
-# Load data for dashboard
-historical_df, current_df = load_data()
+# Load data for dashboard: current stock plus the per-component demand means,
+# so the landing page never loads the full usage history
+try:
+    current_df = load_current_data()
+    demand_means = load_demand_summary()
+    if demand_means is None:
+        # No fresh summary: stream the means of just the components charted below
+        demand_means = mean_usage(tuple(
+            current_df['Component_ID'].head(RECENT_COMPONENT_COUNT).astype(str)))
+except (OSError, ValueError):
+    current_df, demand_means = None, None
 
 # Hero Section
 col1, col2 = st.columns([2, 1])
@@ -67,30 +117,27 @@ with col2:
         st.info(f"📦 {len(current_df)} Components Loaded")
 
 # Quick Stats Dashboard
-if current_df is not None and historical_df is not None:
+if current_df is not None and demand_means is not None:
     st.markdown("---")
     st.subheader("📊 Quick System Overview")
     
     # Calculate key metrics
-    total_components = len(current_df)
-    total_categories = current_df['Category'].nunique()
-    total_inventory_value = (current_df['Current_Stock'] * current_df['Unit_Cost']).sum()
-    avg_unit_cost = current_df['Unit_Cost'].mean()
+    stats = compute_dashboard(current_df, demand_means)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Components", total_components)
+        st.metric("Total Components", stats['total_components'])
     
     with col2:
-        st.metric("Inventory Categories", total_categories)
+        st.metric("Inventory Categories", stats['total_categories'])
     
     with col3:
         # Convert to Indian Rupees
-        st.metric("Total Inventory Value", f"₹{total_inventory_value:,.0f}")
+        st.metric("Total Inventory Value", f"₹{stats['total_inventory_value']:,.0f}")
     
     with col4:
-        st.metric("Average Unit Cost", f"₹{avg_unit_cost:.2f}")
+        st.metric("Average Unit Cost", f"₹{stats['avg_unit_cost']:.2f}")
 
 # Features Grid
 st.markdown("---")
@@ -99,8 +146,8 @@ st.subheader("🎯 System Features")
 feature_col1, feature_col2, feature_col3 = st.columns(3)
 
 with feature_col1:
-    st.markdown("### 📈 Demand Analysis")
     st.markdown("""
+    ### 📈 Demand Analysis
     - AI-powered demand forecasting
     - Safety stock calculations
     - Optimal inventory levels
@@ -108,8 +155,8 @@ with feature_col1:
     """)
 
 with feature_col2:
-    st.markdown("### 💰 Financial Dashboard")
     st.markdown("""
+    ### 💰 Financial Dashboard
     - Cost savings analysis
     - ROI calculations
     - Capital optimization
@@ -117,8 +164,8 @@ with feature_col2:
     """)
 
 with feature_col3:
-    st.markdown("### 📊 Portfolio Overview")
     st.markdown("""
+    ### 📊 Portfolio Overview
     - Component categorization
     - Stock level monitoring
     - Performance metrics
@@ -129,36 +176,45 @@ with feature_col3:
 st.markdown("---")
 st.subheader("🚀 Get Started")
 
-action_col1, action_col2, action_col3 = st.columns(3)
+# Button clicks rerun only the fragment, not the charts and stats above
+@st.fragment
+def quick_actions():
+    action_col1, action_col2, action_col3 = st.columns(3)
+
+    with action_col1:
+        if st.button("📈 Start Demand Analysis", use_container_width=True):
+            st.switch_page("pages/demand_analysis.py")
 
-with action_col1:
-    if st.button("📈 Start Demand Analysis", use_container_width=True):
-        st.switch_page("pages/demand_analysis.py")
+    with action_col2:
+        if st.button("💰 View Financial Dashboard", use_container_width=True):
+            st.switch_page("pages/financial_dashboard.py")
 
-with action_col2:
-    if st.button("💰 View Financial Dashboard", use_container_width=True):
-        st.switch_page("pages/financial_dashboard.py")
+    with action_col3:
+        if st.button("📋 Generate Reports", use_container_width=True):
+            st.switch_page("pages/reports.py")
 
-with action_col3:
-    if st.button("📋 Generate Reports", use_container_width=True):
-        st.switch_page("pages/reports.py")
+quick_actions()
 
 # Additional navigation
 st.markdown("---")
 st.subheader("📊 Additional Tools")
 
-action_col4, action_col5 = st.columns(2)
+@st.fragment
+def additional_tools():
+    action_col4, action_col5 = st.columns(2)
 
-with action_col4:
-    if st.button("🔍 Portfolio Overview", use_container_width=True):
-        st.switch_page("pages/portfolio_overview.py")
+    with action_col4:
+        if st.button("🔍 Portfolio Overview", use_container_width=True):
+            st.switch_page("pages/portfolio_overview.py")
 
-with action_col5:
-    if st.button("📈 View All Analytics", use_container_width=True):
-        st.info("Navigate using the sidebar or buttons above")
+    with action_col5:
+        if st.button("📈 View All Analytics", use_container_width=True):
+            st.info("Navigate using the sidebar or buttons above")
+
+additional_tools()
 
 # Recent Activity (if data available)
-if historical_df is not None and current_df is not None:
+if demand_means is not None and current_df is not None:
     st.markdown("---")
     st.subheader("📈 Recent System Activity")
     
@@ -166,23 +222,15 @@ if historical_df is not None and current_df is not None:
     
     with col1:
         # Top categories by stock value
-        category_value = current_df.groupby('Category').apply(
-            lambda x: (x['Current_Stock'] * x['Unit_Cost']).sum()
-        ).reset_index(name='Total_Value')
-        
-        fig1 = px.pie(category_value, values='Total_Value', names='Category',
-                     title="Inventory Distribution by Category")
+        fig1 = category_value_fig(stats['category_value'])
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Recent demand trends (sample)
-        recent_components = current_df['Component_ID'].head(5)
-        recent_data = historical_df[historical_df['Component_ID'].isin(recent_components)]
+        recent_summary = stats['recent_summary']
         
-        if not recent_data.empty:
-            recent_summary = recent_data.groupby('Component_ID')['Units_Used'].mean().reset_index()
-            fig2 = px.bar(recent_summary, x='Component_ID', y='Units_Used',
-                         title="Average Demand - Top 5 Components")
+        if not recent_summary.empty:
+            fig2 = recent_demand_fig(recent_summary)
             st.plotly_chart(fig2, use_container_width=True)
 
 # Navigation Guide
@@ -224,12 +272,10 @@ st.subheader("🛠️ System Status")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    st.success("✅ Data Loading: Operational")
-    st.success("✅ AI Models: Ready")
+    st.success("✅ Data Loading: Operational  \n✅ AI Models: Ready")
 
 with col2:
-    st.success("✅ Analytics Engine: Active")
-    st.success("✅ Reporting System: Online")
+    st.success("✅ Analytics Engine: Active  \n✅ Reporting System: Online")
 
 with col3:
     st.info("🕒 Last Updated: Now")
@@ -0,0 +1,230 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+# Columns the app reads from each data file and their dtypes, shared by the
+# loaders and scripts/convert_to_parquet.py
+HISTORICAL_COLUMNS = ['Date', 'Component_ID', 'Units_Used']
+HISTORICAL_DTYPES = {'Component_ID': 'category', 'Units_Used': 'int32'}
+CURRENT_COLUMNS = ['Component_ID', 'Category', 'Current_Stock', 'Unit_Cost']
+CURRENT_DTYPES = {'Component_ID': 'category', 'Category': 'category', 'Current_Stock': 'int32',
+                  'Unit_Cost': 'float64'}
+
+
+def write_data_file(df, name):
+    """
+    Write df to data/<name>.parquet (zstd-compressed). The file is written
+    under a temporary name and renamed into place, so a concurrent reader
+    sees either the previous file or the complete new one, never a partial write.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir='data', prefix=f'.{name}.', suffix='.parquet.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow', compression='zstd', index=False)
+        os.replace(tmp_path, f'data/{name}.parquet')
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _parquet_is_fresh(name, source=None):
+    # source names the CSV the Parquet file was built from (default: its own)
+    parquet_path = f'data/{name}.parquet'
+    csv_path = f'data/{source or name}.csv'
+    return os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path)
+        or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path))
+
+
+def iter_data_file(name, usecols, chunksize=500_000, **csv_kwargs):
+    """
+    Yield the usecols columns of data/<name> as frames of at most chunksize
+    rows, from the Parquet copy when it is fresh and the CSV otherwise, so a
+    reduction over the file never holds all of it in memory
+    """
+    if _parquet_is_fresh(name):
+        for batch in pq.ParquetFile(f'data/{name}.parquet').iter_batches(
+                batch_size=chunksize, columns=usecols):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(f'data/{name}.csv', usecols=usecols, chunksize=chunksize,
+                         **csv_kwargs) as reader:
+            yield from reader
+
+
+def read_data_file(name, usecols, **csv_kwargs):
+    """
+    Read the usecols columns of data/<name>.parquet when it is at least as new
+    as data/<name>.csv, otherwise parse the CSV with the given read_csv
+    arguments and write the Parquet copy so the next cold start skips the parse
+    """
+    csv_path = f'data/{name}.csv'
+    parquet_path = f'data/{name}.parquet'
+    if _parquet_is_fresh(name):
+        # split_blocks keeps each column its own block instead of consolidating
+        # them with a copy; self_destruct releases the Arrow buffers as they convert
+        return pq.read_table(parquet_path, columns=usecols).to_pandas(
+            split_blocks=True, self_destruct=True)
+    df = pd.read_csv(csv_path, usecols=usecols, **csv_kwargs)
+    try:
+        write_data_file(df, name)
+    except OSError:
+        # Read-only deployments keep parsing the CSV
+        pass
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def load_current_data():
+    """
+    Current stock frame on its own, for the landing page, which never needs
+    the full usage history
+    """
+    return read_data_file('current_stocks', CURRENT_COLUMNS, engine='c', low_memory=False,
+                          dtype=CURRENT_DTYPES)
+
+
+@st.cache_data(show_spinner=False)
+def load_data():
+    """
+    Historical usage and current stock frames, cached once for every page.
+    A missing or unreadable file raises instead of returning a placeholder,
+    so the failure is never cached and the next run retries the read.
+    """
+    # Every column is typed up front, so the C parser reads in one pass
+    # without low_memory's chunked type inference
+    historical = read_data_file('historical_data', HISTORICAL_COLUMNS, engine='c', low_memory=False,
+                                parse_dates=['Date'], dtype=HISTORICAL_DTYPES)
+    # A copy from load_current_data's cache, so re-typing it below is safe
+    current = load_current_data()
+
+    # Both frames share one Component_ID dictionary, so joins and isin between
+    # them compare integer codes instead of falling back to the string values
+    component_ids = pd.CategoricalDtype(
+        historical['Component_ID'].cat.categories.union(current['Component_ID'].cat.categories))
+    historical['Component_ID'] = historical['Component_ID'].astype(component_ids)
+    current['Component_ID'] = current['Component_ID'].astype(component_ids)
+    return historical, current
+
+
+@st.cache_data(show_spinner=False)
+def mean_usage(components):
+    """
+    Mean Units_Used of each of the given components (a tuple, so it can key
+    the cache), indexed by Component_ID. The history is streamed in chunks and
+    only the running sums and counts of those components are kept; components
+    with no history are left out.
+    """
+    totals = []
+    for chunk in iter_data_file('historical_data', ['Component_ID', 'Units_Used'],
+                                engine='c', dtype=HISTORICAL_DTYPES):
+        selected = chunk[chunk['Component_ID'].isin(components)]
+        totals.append(selected.groupby('Component_ID', sort=False, observed=True)['Units_Used']
+                      .agg(['sum', 'count']))
+    if not totals:
+        return pd.Series(dtype=np.float64, name='Units_Used')
+    # Chunks carry their own category dictionaries, so combine on plain labels
+    combined = pd.concat(totals)
+    combined.index = combined.index.astype(str)
+    combined = combined.groupby(level=0).sum()
+    return (combined['sum'] / combined['count']).rename('Units_Used').rename_axis('Component_ID')
+
+
+@st.cache_data(show_spinner=False)
+def load_demand_summary():
+    """
+    Mean Units_Used per component, indexed by Component_ID, from
+    data/demand_summary.parquet (scripts/build_summaries.py). None when the
+    summary is missing or older than the history CSV.
+    """
+    if _parquet_is_fresh('demand_summary', source='historical_data'):
+        return pd.read_parquet('data/demand_summary.parquet', engine='pyarrow').set_index(
+            'Component_ID')['Units_Used']
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def compute_component_stats(ddof=1):
+    """
+    Per-component demand statistics (mean, std, sum) of the load_data()
+    history, indexed by Component_ID. Shared by the pages so the history is
+    aggregated once per ddof; held as a resource, so reruns get the same
+    frame back without hashing the history: treat it as read-only.
+    ddof=0 gives the population std that analyze_inventory uses.
+    """
+    historical, _ = load_data()
+    grouped = historical.groupby('Component_ID', sort=False, observed=True)['Units_Used']
+    stats = grouped.agg(['mean', 'sum'])
+    stats.insert(1, 'std', grouped.std(ddof=ddof))
+    return stats
+
+
+@st.cache_resource(show_spinner=False)
+def component_histories():
+    """
+    Each component's usage history from load_data(), keyed by Component_ID.
+    Grouped once, so selecting a component is a dict lookup instead of a
+    full-column scan. Held as a resource, so every rerun gets the same
+    objects back without hashing or copying the history: treat the frames
+    as read-only.
+    """
+    historical, _ = load_data()
+    return {cid: g.reset_index(drop=True)
+            for cid, g in historical.groupby('Component_ID', sort=False, observed=True)}
+
+
+def top_k_positions(values, k):
+    """
+    Positions of the k largest values, largest first. np.argpartition plus a
+    sort of only those k, so one call can back several top-n slices. Ties
+    keep the earliest positions, in order, as nlargest(keep='first') does.
+    """
+    values = np.asarray(values)
+    k = min(k, values.size)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-values, k - 1)[:k]
+    cutoff = values[top].min()
+    if not np.isnan(cutoff):
+        # argpartition picks arbitrary ties at the cut-off; take the first ones
+        above = np.flatnonzero(values > cutoff)
+        ties = np.flatnonzero(values == cutoff)[:k - above.size]
+        top = np.concatenate([above, ties])
+    top = np.sort(top)
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+def lttb_downsample(x, y, n_out=500):
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns (x, y) reduced to at
+    most n_out points that keep the visual shape of the line; inputs shorter
+    than that are returned unchanged. x may be numeric or datetime64.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # Datetimes are compared as integer nanoseconds
+    xf = x.astype('datetime64[ns]').view(np.int64).astype(float) if x.dtype.kind == 'M' else x.astype(float)
+    yf = y.astype(float)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[nlo:nhi].mean()
+        avg_y = yf[nlo:nhi].mean()
+        area = np.abs((xf[a] - avg_x) * (yf[lo:hi] - yf[a])
+                      - (xf[a] - xf[lo:hi]) * (avg_y - yf[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]